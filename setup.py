@@ -0,0 +1,13 @@
+from setuptools import setup
+
+# The compiled kernels are an optional accelerator: build them when
+# Cython is available, fall back to the pure-Python implementations
+# otherwise.
+try:
+    from Cython.Build import cythonize
+
+    ext_modules = cythonize(["src/dieboldmariano/_kernels.pyx"])
+except ImportError:
+    ext_modules = []
+
+setup(ext_modules=ext_modules)
@@ -1,6 +1,10 @@
-from itertools import islice
-from typing import Sequence, Callable, List, Tuple
-from math import lgamma, fabs, isnan, nan, exp, log, log1p, sqrt
+from functools import lru_cache
+from typing import Sequence, Callable, Optional, Tuple
+from math import (
+    lgamma, fabs, isnan, nan, exp, log, log1p, sqrt, erfc, atan2, cos, sin, pi, copysign
+)
+
+import numpy as np
 
 
 class InvalidParameterException(Exception):
@@ -13,13 +17,103 @@ class ZeroVarianceException(ArithmeticError):
         super().__init__(message)
 
 
+def _squared_error(u: float, v: float) -> float:
+    return (u - v) ** 2
+
+
+def _loss_differential(
+    V: np.ndarray,
+    P1: np.ndarray,
+    P2: np.ndarray,
+    loss: Callable[[float, float], float],
+) -> Optional[np.ndarray]:
+    """
+    Returns the series of loss differentials between the two prediction
+    series as a float64 array, or `None` if the loss function does not
+    broadcast over arrays and the series must be evaluated element-wise.
+    """
+    n = len(V)
+    if loss is _squared_error:
+        return (V - P1) ** 2 - (V - P2) ** 2
+
+    try:
+        D = np.asarray(loss(V, P1) - loss(V, P2), dtype=float)
+        if D.shape != (n,):
+            raise ValueError
+        return D
+    except Exception:
+        return None
+
+
+def _welford_differential(
+    V: Sequence[float],
+    P1: Sequence[float],
+    P2: Sequence[float],
+    loss: Callable[[float, float], float],
+) -> Tuple[float, float]:
+    """
+    Returns the mean of the loss differential series and its sum of
+    squared deviations from the mean, computed in a single pass with
+    Welford's online algorithm and O(1) working memory.
+    """
+    mean = 0.0
+    m2 = 0.0
+    i = 0
+    for v, p1, p2 in zip(V, P1, P2):
+        d = loss(v, p1) - loss(v, p2)
+        i += 1
+        delta = d - mean
+        mean += delta / i
+        m2 += delta * (d - mean)
+    return mean, m2
+
+
+# Above this work bound the O(n log n) FFT formulation beats the
+# direct O(h * n) per-lag dot products.
+_FFT_THRESHOLD = 1 << 16
+
+# Degrees of freedom from which the Student t p-value is computed with
+# the normal approximation.
+_NORMAL_APPROX_DF = 100
+
+
+def _autocov_fft(D: np.ndarray, h: int, mean: float) -> np.ndarray:
+    """
+    Returns the autocovariances of `D` at lags `0` to `h - 1` as an array,
+    computed via the Wiener-Khinchin theorem with a single real FFT.
+    """
+    n = len(D)
+    Dc = D - mean
+    nfft = 1 << (2 * n - 1).bit_length()
+    F = np.fft.rfft(Dc, nfft)
+    return np.fft.irfft(F.real ** 2 + F.imag ** 2, nfft)[:h] / n
+
+
+def _autocovariances(D: np.ndarray, h: int, mean: float) -> np.ndarray:
+    """
+    Returns the autocovariances of `D` at lags `0` to `h - 1` as an array.
+    """
+    n = len(D)
+    if h * n > _FFT_THRESHOLD:
+        return _autocov_fft(D, h, mean)
+
+    Dc = D - mean
+    gamma = np.empty(h)
+    for k in range(h):
+        gamma[k] = np.dot(Dc[k:], Dc[: n - k]) / n
+    return gamma
+
+
 def autocovariance(X: Sequence[float], k: int, mean: float) -> float:
     """
-    Returns the k-lagged autocovariance for the input iterable.
+    Returns the k-lagged autocovariance for the input sequence.
     """
-    return sum((a - mean) * (b - mean) for a, b in zip(islice(X, k, None), X)) / len(X)
+    Xc = np.asarray(X, dtype=float) - mean
+    n = len(Xc)
+    return float(np.dot(Xc[k:], Xc[: n - k])) / n
 
 
+@lru_cache(maxsize=256)
 def log_beta(a: float, b: float) -> float:
     """
     Returns the natural logarithm of the beta function computed on
@@ -41,7 +135,7 @@ def evaluate_continuous_fraction(
     Evaluate a continuous fraction.
     """
     h_prev = fa(0, x)
-    if fabs(h_prev < small):
+    if -small < h_prev < small:
         h_prev = small
 
     n: int = 1
@@ -54,11 +148,11 @@ def evaluate_continuous_fraction(
         b = fb(n, x)
 
         dn = a + b * d_prev
-        if fabs(dn) < small:
+        if -small < dn < small:
             dn = small
 
         cn = a + b / c_prev
-        if fabs(cn) < small:
+        if -small < cn < small:
             cn = small
 
         dn = 1 / dn
@@ -77,31 +171,190 @@ def evaluate_continuous_fraction(
     return hn
 
 
+# Number of continued-fraction coefficients precomputed for the
+# pure-Python path; the fraction typically converges well within this.
+_CF_TERMS = 512
+
+
+def _ribeta_cf_coefficients(x: float, a: float, b: float, count: int) -> np.ndarray:
+    """
+    Returns the first `count` b-coefficients (for n = 1, 2, ...) of the
+    continued fraction of the regularized incomplete beta function,
+    computed in a few vectorized passes.
+    """
+    fbs = np.empty(count)
+    m = np.arange(0.0, (count + 1) // 2)  # n = 1, 3, 5, ...
+    fbs[0::2] = -((a + m) * (a + b + m) * x) / ((a + 2 * m) * (a + 2 * m + 1.0))
+    m = np.arange(1.0, count // 2 + 1)  # n = 2, 4, 6, ...
+    fbs[1::2] = (m * (b - m) * x) / ((a + 2 * m - 1) * (a + 2 * m))
+    return fbs
+
+
+def evaluate_continuous_fraction_array(
+    fbs: Sequence[float], *, epsilon: float = 1e-10, small: float = 1e-50
+) -> float:
+    """
+    Evaluate a continued fraction whose a-coefficients are all one, given
+    the array of its b-coefficients. The inner loop only indexes into the
+    precomputed array, with no per-term coefficient dispatch.
+    """
+    h_prev = 1.0
+    d_prev = 0.0
+    inv_c_prev = 1.0 / h_prev
+    hn = h_prev
+
+    for bn in np.asarray(fbs).tolist():
+        dn = 1.0 + bn * d_prev
+        if -small < dn < small:
+            dn = small
+
+        cn = 1.0 + bn * inv_c_prev
+        if -small < cn < small:
+            cn = small
+
+        dn = 1 / dn
+        delta_n = cn * dn
+        hn = h_prev * delta_n
+
+        if fabs(delta_n - 1.0) < epsilon:
+            break
+
+        d_prev = dn
+        inv_c_prev = 1.0 / cn
+        h_prev = hn
+
+    return hn
+
+
+def _ribeta_cf(x: float, a: float, b: float, epsilon: float, maxiter: int) -> float:
+    """
+    Evaluates the continued fraction of the regularized incomplete beta
+    function via the modified Lentz algorithm, with the coefficient
+    recurrences inlined.
+    """
+    small = 1e-50
+    h_prev = 1.0
+    d_prev = 0.0
+    inv_c_prev = 1.0 / h_prev
+    hn = h_prev
+
+    n = 1
+    while n < maxiter:
+        if n % 2 == 0:
+            m = n / 2.0
+            bn = (m * (b - m) * x) / ((a + (2 * m) - 1) * (a + (2 * m)))
+        else:
+            m = (n - 1.0) / 2.0
+            bn = -((a + m) * (a + b + m) * x) / ((a + (2 * m)) * (a + (2 * m) + 1.0))
+
+        # Branchless clamp away from zero: compiled code executes this
+        # without a potentially mispredicted branch.
+        dn = 1.0 + bn * d_prev
+        dn = copysign(max(fabs(dn), small), dn)
+
+        cn = 1.0 + bn * inv_c_prev
+        cn = copysign(max(fabs(cn), small), cn)
+
+        dn = 1 / dn
+        delta_n = cn * dn
+        hn = h_prev * delta_n
+
+        if fabs(delta_n - 1.0) < epsilon:
+            break
+
+        d_prev = dn
+        inv_c_prev = 1.0 / cn
+        h_prev = hn
+
+        n += 1
+
+    return hn
+
+
+_have_cf_kernel = True
+try:
+    from ._kernels import ribeta_cf as _ribeta_cf
+except ImportError:
+    try:
+        from numba import njit
+
+        _ribeta_cf = njit(cache=True, fastmath=True)(_ribeta_cf)
+    except ImportError:
+        _have_cf_kernel = False
+
+
 def regularized_incomplete_beta(
     x: float, a: float, b: float, *, epsilon: float = 1e-10, maxiter: int = 10000
 ) -> float:
     if isnan(x) or isnan(a) or isnan(b) or x < 0 or x > 1 or a <= 0 or b <= 0:
         return nan
 
-    if x > (a + 1) / (2 + b + a) and 1 - x <= (b + 1) / (2 + b + a):
-        return 1 - regularized_incomplete_beta(
-            1 - x, b, a, epsilon=epsilon, maxiter=maxiter
+    flip = x > (a + 1) / (2 + b + a) and 1 - x <= (b + 1) / (2 + b + a)
+    if flip:
+        x, a, b = 1 - x, b, a
+
+    if _have_cf_kernel:
+        cf = _ribeta_cf(x, a, b, epsilon, maxiter)
+    else:
+        cf = evaluate_continuous_fraction_array(
+            _ribeta_cf_coefficients(x, a, b, min(maxiter, _CF_TERMS)),
+            epsilon=epsilon,
         )
 
-    def fa(n: int, x: float) -> float:
-        return 1.0
+    # Combine prefactor and continued fraction in log-space: for large
+    # shape parameters exp() of the prefactor alone underflows to zero
+    # even when the ratio is representable.
+    log_pref = a * log(x) + b * log1p(-x) - log(a) - log_beta(a, b)
+    result = exp(log_pref - log(cf)) if cf > 0 else exp(log_pref) / cf
 
-    def fb(n: int, x: float) -> float:
-        if n % 2 == 0:
-            m = n / 2.0
-            return (m * (b - m) * x) / ((a + (2 * m) - 1) * (a + (2 * m)))
+    return 1 - result if flip else result
 
-        m = (n - 1.0) / 2.0
-        return -((a + m) * (a + b + m) * x) / ((a + (2 * m)) * (a + (2 * m) + 1.0))
 
-    return exp(
-        a * log(x) + b * log1p(-x) - log(a) - log_beta(a, b)
-    ) / evaluate_continuous_fraction(fa, fb, x, epsilon=epsilon, maxiter=maxiter)
+def _student_t_sf_two_sided(t: float, df: int) -> float:
+    """
+    Returns the two-sided tail probability of the Student t distribution
+    with integer degrees of freedom `df`, i.e. `P(|T| > |t|)`, via the
+    classical finite trigonometric sums (Abramowitz & Stegun 26.7.3-4).
+    """
+    theta = atan2(fabs(t), sqrt(df))
+    c2 = cos(theta) ** 2
+
+    if df % 2 == 1:
+        if df == 1:
+            return 1 - 2 * theta / pi
+        term = cos(theta)
+        acc = term
+        for j in range(3, df - 1, 2):
+            term *= c2 * (j - 1) / j
+            acc += term
+        return 1 - 2 / pi * (theta + sin(theta) * acc)
+
+    term = 1.0
+    acc = term
+    for j in range(2, df - 1, 2):
+        term *= c2 * (j - 1) / j
+        acc += term
+    return 1 - sin(theta) * acc
+
+
+def _dm_pvalue(dmstat: float, n: int, one_sided: bool) -> float:
+    """
+    Returns the p-value of the DM statistic for a sample of size `n`.
+    """
+    if n - 1 >= _NORMAL_APPROX_DF:
+        # For this many degrees of freedom the Student t distribution is
+        # well approximated by the normal, whose tail probability is a
+        # single erfc evaluation.
+        pvalue = erfc(fabs(dmstat) / sqrt(2))
+    else:
+        # The degrees of freedom are a (small) integer here, so the tail
+        # has an exact finite closed form: no continued fraction needed.
+        pvalue = _student_t_sf_two_sided(dmstat, n - 1)
+
+    if one_sided:
+        pvalue = pvalue / 2 if dmstat < 0 else 1 - pvalue / 2
+
+    return pvalue
 
 
 def dm_test(
@@ -109,10 +362,11 @@ def dm_test(
     P1: Sequence[float],
     P2: Sequence[float],
     *,
-    loss: Callable[[float, float], float] = lambda u, v: (u - v) ** 2,
+    loss: Callable[[float, float], float] = _squared_error,
     h: int = 1,
     one_sided: bool = False,
-    harvey_correction: bool = True
+    harvey_correction: bool = True,
+    kernel: str = "uniform"
 ) -> Tuple[float, float]:
     r"""
     Performs the Diebold-Mariano test. The null hypothesis is that the two forecasts (`P1`, `P2`) have the same accuracy.
@@ -120,7 +374,8 @@ def dm_test(
     Parameters
     ----------
     V: Sequence[float]
-        The actual timeseries.
+        The actual timeseries. All three series are converted to contiguous float64 NumPy
+        arrays internally, so passing arrays of that type directly avoids a copy.
 
     P1: Sequence[float]
         First prediction series.
@@ -132,7 +387,9 @@ def dm_test(
         Loss function. At each time step of the series, each prediction is charged a loss, 
         computed as per this function. The Diebold-Mariano test is agnostic with respect to 
         the loss function, and this implementation supports arbitrarily specified (for example asymmetric) 
-        functions. The two arguments are, *in this order*, the actual value and the predicted value. 
+        functions. The two arguments are, *in this order*, the actual value and the predicted value.
+        Custom losses are first attempted on whole NumPy arrays (which is fast if the function is
+        built from array-compatible operations), falling back to element-wise evaluation otherwise.
         Default is squared error (i.e. `lambda u, v: (u - v) ** 2`)
 
     h: int
@@ -144,6 +401,12 @@ def dm_test(
     harvey_correcetion: bool
         If set to true, uses a modified test statistics as per Harvey, Leybourne and Newbold (1997).
 
+    kernel: str
+        Weighting of the lagged autocovariances in the long-run variance estimate. `"uniform"`
+        (the default) weights all lags up to `h - 1` equally, as in the original Diebold-Mariano
+        formulation. `"bartlett"` applies linearly decaying Bartlett weights, which guarantees a
+        non-negative variance estimate.
+
     Returns
     -------
     A tuple of two values. The first is the test statistic, the second is the p-value.
@@ -158,29 +421,49 @@ def dm_test(
             "Invalid parameter for horizon length. Must be a positive integer."
         )
 
-    n = len(P1)
-    mean = 0.0
-    loss1 = 0.0
-    loss2 = 0.0
-    D: List[float] = []
+    if h > len(V):
+        raise InvalidParameterException(
+            "Invalid parameter for horizon length. Must not exceed the series length."
+        )
 
-    for v, p1, p2 in zip(V, P1, P2):
-        l1 = loss(v, p1)
-        l2 = loss(v, p2)
-        D.append(l1 - l2)
-        mean += l1 - l2
-        loss1 += l1
-        loss2 += l2
+    if kernel not in ("uniform", "bartlett"):
+        raise InvalidParameterException(
+            "Invalid variance kernel. Must be 'uniform' or 'bartlett'."
+        )
 
-    mean /= n
+    V = np.ascontiguousarray(V, dtype=np.float64)
+    P1 = np.ascontiguousarray(P1, dtype=np.float64)
+    P2 = np.ascontiguousarray(P2, dtype=np.float64)
 
-    V_d = 0.0
-    for i in range(h):
-        V_d += autocovariance(D, i, mean)
-        if i == 0:
-            V_d /= 2
+    if np.array_equal(P1, P2):
+        raise ZeroVarianceException(
+            "Variance of the DM statistic is zero. Maybe the prediction series are identical?"
+        )
 
-    V_d = 2 * V_d / n
+    n = len(P1)
+    D = _loss_differential(V, P1, P2, loss)
+
+    if D is None and h == 1:
+        # Only the mean and the lag-0 autocovariance are needed: one
+        # element-wise pass with O(1) memory instead of building D.
+        mean, m2 = _welford_differential(V, P1, P2, loss)
+        V_d = m2 / n / n
+    else:
+        if D is None:
+            D = np.fromiter(
+                (loss(v, p1) - loss(v, p2) for v, p1, p2 in zip(V, P1, P2)),
+                dtype=float,
+                count=n,
+            )
+        mean = float(D.mean())
+        gamma = _autocovariances(D, h, mean)
+        weights = np.empty(h)
+        weights[0] = 1.0
+        if kernel == "bartlett":
+            weights[1:] = 2.0 * (1.0 - np.arange(1, h) / h)
+        else:
+            weights[1:] = 2.0
+        V_d = float(weights @ gamma) / n
 
     if V_d == 0:
         raise ZeroVarianceException(
@@ -193,11 +476,119 @@ def dm_test(
     else:
         dmstat = mean / sqrt(V_d)
 
-    pvalue = regularized_incomplete_beta(
-        (n - 1) / ((n - 1) + dmstat ** 2), 0.5 * (n - 1), 0.5
-    )
+    return dmstat, _dm_pvalue(dmstat, n, one_sided)
 
-    if one_sided:
-        pvalue = pvalue / 2 if dmstat < 0 else 1 - pvalue / 2
 
-    return dmstat, pvalue
+def dm_test_batch(
+    V: Sequence[float],
+    P: Sequence[Sequence[float]],
+    *,
+    loss: Callable[[float, float], float] = _squared_error,
+    h: int = 1,
+    one_sided: bool = False,
+    harvey_correction: bool = True,
+    kernel: str = "uniform"
+) -> Tuple[np.ndarray, np.ndarray]:
+    r"""
+    Performs the Diebold-Mariano test for every pair of prediction series in `P`.
+
+    This is equivalent to calling `dm_test(V, P[i], P[j])` for all pairs `(i, j)`, but
+    the per-series losses, means and lagged cross-products are each computed once and
+    shared across pairs, so the cost grows with the number of series rather than with
+    the number of pairs for everything except the final statistics.
+
+    Parameters
+    ----------
+    V: Sequence[float]
+        The actual timeseries.
+
+    P: Sequence[Sequence[float]]
+        The prediction series, one per row, all of the same length as `V`.
+
+    The keyword parameters have the same meaning as in `dm_test`.
+
+    Returns
+    -------
+    A tuple of two `m` by `m` arrays, where `m` is the number of prediction series.
+    The first holds the test statistics, the second the p-values; entry `(i, j)`
+    compares `P[i]` against `P[j]`. Entries on the diagonal, and off-diagonal entries
+    for pairs whose loss differential has zero variance, are NaN.
+    """
+    V = np.ascontiguousarray(V, dtype=np.float64)
+    P = np.ascontiguousarray(P, dtype=np.float64)
+
+    if P.ndim != 2 or P.shape[1] != len(V):
+        raise InvalidParameterException(
+            "Prediction series must form a matrix with one row per series, "
+            "each of the same length as the actual timeseries."
+        )
+
+    if h <= 0:
+        raise InvalidParameterException(
+            "Invalid parameter for horizon length. Must be a positive integer."
+        )
+
+    if h > len(V):
+        raise InvalidParameterException(
+            "Invalid parameter for horizon length. Must not exceed the series length."
+        )
+
+    if kernel not in ("uniform", "bartlett"):
+        raise InvalidParameterException(
+            "Invalid variance kernel. Must be 'uniform' or 'bartlett'."
+        )
+
+    m, n = P.shape
+
+    if loss is _squared_error:
+        L = (V - P) ** 2
+    else:
+        try:
+            L = np.asarray(loss(np.broadcast_to(V, P.shape), P), dtype=float)
+            if L.shape != P.shape:
+                raise ValueError
+        except Exception:
+            L = np.empty_like(P)
+            for i in range(m):
+                L[i] = np.fromiter(
+                    (loss(v, p) for v, p in zip(V, P[i])), dtype=float, count=n
+                )
+
+    mu = L.mean(axis=1)
+    Lc = L - mu[:, None]
+
+    weights = np.empty(h)
+    weights[0] = 1.0
+    if kernel == "bartlett":
+        weights[1:] = 2.0 * (1.0 - np.arange(1, h) / h)
+    else:
+        weights[1:] = 2.0
+
+    # The lag-k autocovariance of D_ij = L[i] - L[j] expands into the four
+    # lagged cross-products A[i, i] - A[i, j] - A[j, i] + A[j, j], so one
+    # m x m matrix product per lag covers every pair at once.
+    G = np.zeros((m, m))
+    for k in range(h):
+        A = Lc[:, k:] @ Lc[:, : n - k].T / n
+        diag = np.diagonal(A)
+        G += weights[k] * (diag[:, None] + diag[None, :] - A - A.T)
+    V_d = G / n
+
+    M = mu[:, None] - mu[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dmstats = M / np.sqrt(V_d)
+    if harvey_correction:
+        dmstats *= sqrt((n + 1 - 2 * h + h * (h - 1) / n) / n)
+
+    pvalues = np.full((m, m), nan)
+    for i in range(m):
+        for j in range(i + 1, m):
+            t = dmstats[i, j]
+            if isnan(t):
+                continue
+            pvalues[i, j] = _dm_pvalue(t, n, one_sided)
+            pvalues[j, i] = (
+                _dm_pvalue(-t, n, one_sided) if one_sided else pvalues[i, j]
+            )
+
+    return dmstats, pvalues
@@ -1,9 +1,17 @@
 from typing import Sequence, Tuple, Callable
 
+import numpy as np
+
 def autocovariance(X: Sequence[float], k: int, mean: float) -> float: ...
 
 def log_beta(a: float, b: float) -> float: ...
 
+def evaluate_continuous_fraction_array(
+        fbs: Sequence[float],
+        *,
+        epsilon: float = ...,
+        small: float = ...) -> float: ...
+
 def evaluate_continuous_fraction(
         fa: Callable[[int, float], float],
         fb: Callable[[int, float], float],
@@ -29,4 +37,15 @@ def dm_test(
         loss: Callable[[float, float], float] = ...,
         h: int = ...,
         one_sided: bool = ...,
-        harvey_correction: bool = ...) -> Tuple[float, float]: ...
+        harvey_correction: bool = ...,
+        kernel: str = ...) -> Tuple[float, float]: ...
+
+def dm_test_batch(
+        V: Sequence[float],
+        P: Sequence[Sequence[float]],
+        *,
+        loss: Callable[[float, float], float] = ...,
+        h: int = ...,
+        one_sided: bool = ...,
+        harvey_correction: bool = ...,
+        kernel: str = ...) -> Tuple[np.ndarray, np.ndarray]: ...
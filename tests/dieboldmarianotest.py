@@ -2,7 +2,10 @@ from unittest import TestCase, main
 from src.dieboldmariano import (
     regularized_incomplete_beta,
     dm_test,
+    dm_test_batch,
     autocovariance,
+    InvalidParameterException,
+    ZeroVarianceException,
 )
 
 
@@ -77,6 +80,45 @@ class TestDieboldMariano(TestCase):
         self.assertAlmostEqual(stat, 1.2109, places=4)
         self.assertAlmostEqual(pvalue, 0.877, places=4)
 
+    def test_diebold_mariano_invalid_parameters(self):
+        V = [0, 0, 0]
+        P1 = [0, 1, 2]
+
+        with self.assertRaises(ZeroVarianceException):
+            dm_test(V, P1, P1)
+
+        with self.assertRaises(InvalidParameterException):
+            dm_test(V, P1, [0, 2, 3], h=4)
+
+    def test_diebold_mariano_bartlett(self):
+        V = [0, 0, 0, 0, 0, 0]
+        P1 = [0, 1, 2, 3, 4, 5]
+        P2 = [0, 2, 3, 3, 5, 6]
+        stat, pvalue = dm_test(V, P1, P2, h=2, kernel="bartlett")
+
+        self.assertAlmostEqual(stat, -1.9194, places=4)
+        self.assertAlmostEqual(pvalue, 0.1130, places=4)
+
+
+class TestDieboldMarianoBatch(TestCase):
+    def test_diebold_mariano_batch(self):
+        V = [0, 0, 0, 0, 0, 0]
+        P = [
+            [0, 1, 2, 3, 4, 5],
+            [0, 2, 3, 3, 5, 6],
+            [1, 2, 1, 4, 3, 5],
+        ]
+        stats, pvalues = dm_test_batch(V, P)
+
+        for i in range(3):
+            self.assertNotEqual(stats[i][i], stats[i][i])  # NaN diagonal
+            for j in range(3):
+                if i == j:
+                    continue
+                stat, pvalue = dm_test(V, P[i], P[j])
+                self.assertAlmostEqual(stats[i][j], stat, places=10)
+                self.assertAlmostEqual(pvalues[i][j], pvalue, places=10)
+
 
 if __name__ == "__main__":
     main()